@@ -1,10 +1,14 @@
 import os
 import re
 import hashlib
-from dataclasses import dataclass
+import functools
+from dataclasses import dataclass, field, fields
+from operator import attrgetter
 from datetime import datetime, date, time, timedelta
-from typing import List, Optional, Dict, Tuple
+from itertools import chain
+from typing import Iterable, List, Optional, Dict, Tuple
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 from dateutil.parser import parse as dtparse
@@ -27,7 +31,7 @@ def load_sample_text(path: str = "sample_input.txt") -> str:
 # -----------------------------
 # Data model
 # -----------------------------
-@dataclass
+@dataclass(slots=True)
 class Job:
     title: str
     location: str
@@ -39,48 +43,67 @@ class Job:
     include_travel: bool = True
     work_start_hour: Optional[int] = None
     work_end_hour: Optional[int] = None
+    title_lower: str = field(init=False, repr=False, compare=False)  # cached sort key
+
+    def __post_init__(self):
+        self.title_lower = self.title.lower()
 
 
 # -----------------------------
 # Parsing
 # -----------------------------
 STATUS_WORDS = ["Confirmed", "Hold", "First Option", "Pending Signature", "Pending", "Option"]
+_STATUS_LOOKUP = {w.lower(): w for w in STATUS_WORDS}
+
+BLOCK_RE = re.compile(r"\n\s*\n")
+LOCATION_RE = re.compile(r"(?i)^location:\s*(.*)$")
+_ISO_DATE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})$")
 
 def normalize_ws(s: str) -> str:
     return " ".join((s or "").split()).strip()
 
+@functools.lru_cache(maxsize=2048)
 def safe_date(s: str) -> Optional[date]:
     s = normalize_ws(s)
     if not s:
         return None
+    m = _ISO_DATE.match(s)
+    if m:
+        # Fast path: skip dateutil for plain YYYY-MM-DD
+        try:
+            return date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        except ValueError:
+            return None
     try:
         # Month-first typical agency formatting; change dayfirst=True if needed
         return dtparse(s, dayfirst=False).date()
     except Exception:
         return None
 
+@functools.lru_cache(maxsize=1024)
 def classify_kind(status: str) -> str:
     s = normalize_ws(status).lower()
     if "hold" in s:
         return "HOLD"
     return "WORK"
 
+_LOC_ALIASES = {
+    "nyc": "new york",
+    "new york city": "new york",
+    "paris france": "paris",
+    "milan italy": "milan, italy",
+    "tbd": "tbd",
+    "na": "tbd",
+    "-": "tbd",
+    "": "tbd",
+}
+
+@functools.lru_cache(maxsize=1024)
 def normalize_location(loc: str) -> str:
     x = normalize_ws(loc).lower().replace(".", "")
-    aliases = {
-        "nyc": "new york",
-        "new york city": "new york",
-        "paris france": "paris",
-        "milan italy": "milan, italy",
-        "tbd": "tbd",
-        "na": "tbd",
-        "-": "tbd",
-        "": "tbd",
-    }
-    return aliases.get(x, x)
+    return _LOC_ALIASES.get(x, x)
 
-def is_unknown_location(loc: str) -> bool:
-    return normalize_location(loc) in {"tbd", "unknown"}
+UNKNOWN_LOCATIONS = frozenset({"tbd", "unknown"})
 
 def parse_block(block: str) -> Optional[Job]:
     lines = [ln.rstrip() for ln in block.splitlines() if normalize_ws(ln)]
@@ -98,29 +121,27 @@ def parse_block(block: str) -> Optional[Job]:
         l = normalize_ws(ln)
         low = l.lower()
 
-        if low.startswith("location:"):
-            location = normalize_ws(l.split(":", 1)[1])
+        m = LOCATION_RE.match(l)
+        if m:
+            location = m.group(1)
             continue
 
         if low.startswith("dates:"):
-            rhs = normalize_ws(l.split(":", 1)[1])
-            parts = [normalize_ws(p) for p in rhs.split("to")]
-            if len(parts) == 2:
-                start_d = safe_date(parts[0])
-                end_d = safe_date(parts[1])
-            elif len(parts) == 1:
-                start_d = safe_date(parts[0])
-                end_d = start_d
+            # "Dates: Feb 10 2026 to Feb 13 2026" or single-day "Dates: Feb 14 2026".
+            # Split on " to " as a whole word, any case, so "October" or "TO" still parse.
+            rhs = l[len("dates:"):].strip()
+            idx = rhs.lower().find(" to ")
+            if idx >= 0:
+                start_d = safe_date(rhs[:idx])
+                end_d = safe_date(rhs[idx + 4:])
+            else:
+                start_d = end_d = safe_date(rhs)
             continue
 
         # Status line match
-        matched = False
-        for w in STATUS_WORDS:
-            if low == w.lower():
-                status = w
-                matched = True
-                break
-        if matched:
+        canonical = _STATUS_LOOKUP.get(low)
+        if canonical:
+            status = canonical
             continue
 
         notes_lines.append(l)
@@ -151,7 +172,7 @@ def parse_jobs(text: str) -> List[Job]:
     text = (text or "").replace("\r\n", "\n").strip()
     if not text:
         return []
-    blocks = re.split(r"\n\s*\n", text)
+    blocks = BLOCK_RE.split(text)
     jobs: List[Job] = []
     for b in blocks:
         jb = parse_block(b)
@@ -167,14 +188,26 @@ def dt_to_ics(dt: datetime) -> str:
     # naive UTC timestamp; good enough for Google import
     return dt.strftime("%Y%m%dT%H%M%S")
 
-def make_uid(seed: str) -> str:
-    h = hashlib.sha256(seed.encode("utf-8")).hexdigest()[:24]
-    return f"{h}@itinerary-calendar.local"
+def uid_hasher(prefix: str):
+    """
+    Pre-hashes the fixed part of a UID seed so per-event calls to
+    make_uid only hash the varying suffix.
+    """
+    # 96-bit BLAKE2b: same 24-hex-char UID length, no wasted 32-byte digest
+    return hashlib.blake2b(prefix.encode("utf-8"), digest_size=12)
+
+def make_uid(suffix: str, base=None) -> str:
+    """
+    UID for the seed base-prefix + suffix (just suffix when no base is given).
+    """
+    h = base.copy() if base is not None else uid_hasher("")
+    h.update(suffix.encode("utf-8"))
+    return f"{h.hexdigest()}@itinerary-calendar.local"
+
+_ICS_ESCAPE = str.maketrans({"\\": "\\\\", "\n": "\\n", ",": "\\,", ";": "\\;"})
 
 def escape_ics(text: str) -> str:
-    t = (text or "").replace("\\", "\\\\").replace("\n", "\\n")
-    t = t.replace(",", "\\,").replace(";", "\\;")
-    return t
+    return (text or "").translate(_ICS_ESCAPE)
 
 def add_runid(desc: str, run_id: str) -> str:
     tag = f"RunID: {run_id}"
@@ -190,21 +223,23 @@ def vevent_timed(
     end_dt: datetime,
     location: str,
     description: str,
-    uid: str
+    uid: str,
+    dtstamp: str,
 ) -> str:
-    return "\n".join([
-        "BEGIN:VEVENT",
-        f"UID:{uid}",
-        f"DTSTAMP:{dt_to_ics(datetime.utcnow())}",
-        f"SUMMARY:{escape_ics(summary)}",
-        f"DTSTART:{dt_to_ics(start_dt)}",
-        f"DTEND:{dt_to_ics(end_dt)}",
-        f"LOCATION:{escape_ics(location)}",
-        f"DESCRIPTION:{escape_ics(description)}",
-        "END:VEVENT",
-    ])
-
-def ics_wrap(events: List[str], cal_name: str) -> str:
+    esc = escape_ics
+    return (
+        "BEGIN:VEVENT\n"
+        f"UID:{uid}\n"
+        f"DTSTAMP:{dtstamp}\n"
+        f"SUMMARY:{esc(summary)}\n"
+        f"DTSTART:{dt_to_ics(start_dt)}\n"
+        f"DTEND:{dt_to_ics(end_dt)}\n"
+        f"LOCATION:{esc(location)}\n"
+        f"DESCRIPTION:{esc(description)}\n"
+        "END:VEVENT"
+    )
+
+def ics_wrap(events: Iterable[str], cal_name: str) -> str:
     header = [
         "BEGIN:VCALENDAR",
         "VERSION:2.0",
@@ -213,14 +248,13 @@ def ics_wrap(events: List[str], cal_name: str) -> str:
         f"X-WR-CALNAME:{escape_ics(cal_name)}",
     ]
     footer = ["END:VCALENDAR"]
-    return "\n".join(header + events + footer) + "\n"
+    return "\n".join(chain(header, events, footer)) + "\n"
 
 
 # -----------------------------
 # Group runs (same city blocks)
 # -----------------------------
-def job_sort_key(j: Job):
-    return (j.start_date, j.end_date, j.title.lower())
+job_sort_key = attrgetter("start_date", "end_date", "title_lower")
 
 def merge_city_runs(jobs: List[Job]) -> List[Dict]:
     """
@@ -277,26 +311,35 @@ def compute_trip_boundary_travel(
     travel_start_hour: int,
     travel_end_hour: int,
     run_id: str,
+    dtstamp: str,
+    runs: Optional[List[Dict]] = None,
 ) -> Tuple[List[str], List[str]]:
     """
     One travel-in day BEFORE the run start, one travel-out day AFTER run end,
     only for non-home city runs (and non-TBD).
+    Pass `runs` (from merge_city_runs) to reuse an already-computed grouping.
     """
     if travel_mode == "OFF":
         return [], []
 
     home_norm = normalize_location(home_base)
-    runs = merge_city_runs(jobs)
+    if runs is None:
+        runs = merge_city_runs(jobs)
 
     travel_events: List[str] = []
     warnings: List[str] = []
 
+    desc_in = add_runid("Auto travel-in day (trip boundary).", run_id)
+    desc_out = add_runid("Auto travel-out day (trip boundary).", run_id)
+    uid_in_base = uid_hasher(f"TRAVELIN|{run_id}|")
+    uid_out_base = uid_hasher(f"TRAVELOUT|{run_id}|")
+
     for r in runs:
         city_norm = r["city_norm"]
 
         if city_norm == home_norm:
             continue
-        if is_unknown_location(r["city_label"]) or city_norm == "tbd":
+        if city_norm in UNKNOWN_LOCATIONS:
             continue
         if travel_mode == "MANUAL" and not r["include_travel_any"]:
             continue
@@ -314,11 +357,8 @@ def compute_trip_boundary_travel(
         if out_end <= out_start:
             out_end = out_start + timedelta(hours=2)
 
-        desc_in = add_runid("Auto travel-in day (trip boundary).", run_id)
-        desc_out = add_runid("Auto travel-out day (trip boundary).", run_id)
-
-        uid_in = make_uid(f"TRAVELIN|{run_id}|{home_norm}->{city_norm}|{trip_in_day.isoformat()}")
-        uid_out = make_uid(f"TRAVELOUT|{run_id}|{city_norm}->{home_norm}|{trip_out_day.isoformat()}")
+        uid_in = make_uid(f"{home_norm}->{city_norm}|{trip_in_day.isoformat()}", uid_in_base)
+        uid_out = make_uid(f"{city_norm}->{home_norm}|{trip_out_day.isoformat()}", uid_out_base)
 
         travel_events.append(
             vevent_timed(
@@ -328,6 +368,7 @@ def compute_trip_boundary_travel(
                 f"{home_base} → {r['city_label']}",
                 desc_in,
                 uid_in,
+                dtstamp,
             )
         )
         travel_events.append(
@@ -338,6 +379,7 @@ def compute_trip_boundary_travel(
                 f"{r['city_label']} → {home_base}",
                 desc_out,
                 uid_out,
+                dtstamp,
             )
         )
 
@@ -347,51 +389,70 @@ def compute_trip_boundary_travel(
 # -----------------------------
 # Event builders
 # -----------------------------
-def build_work_events(jobs: List[Job], default_start: int, default_end: int, run_id: str) -> List[str]:
-    events: List[str] = []
-    for j in jobs:
-        if j.kind != "WORK":
-            continue
-
-        start_h = j.work_start_hour if j.work_start_hour is not None else default_start
-        end_h = j.work_end_hour if j.work_end_hour is not None else default_end
-        if end_h <= start_h:
-            end_h = min(23, start_h + 8)
-
-        desc = add_runid(j.notes or f"Status: {j.status}", run_id)
-
-        d = j.start_date
-        while d <= j.end_date:
-            start_dt = datetime.combine(d, time(start_h, 0))
-            end_dt = datetime.combine(d, time(end_h, 0))
-            uid = make_uid(f"WORK|{run_id}|{j.title}|{start_dt.isoformat()}|{end_dt.isoformat()}")
-            events.append(vevent_timed(f"WORK: {j.title}", start_dt, end_dt, j.location, desc, uid))
-            d += timedelta(days=1)
+def iter_days(start: date, end: date):
+    """
+    Yields every date from start to end (inclusive).
+    """
+    for i in range((end - start).days + 1):
+        yield start + timedelta(days=i)
 
-    return events
+def build_events(
+    jobs: List[Job],
+    work_hours: Tuple[int, int],
+    hold_hours: Tuple[int, int],
+    run_id: str,
+    dtstamp: str,
+) -> Tuple[List[str], List[str]]:
+    """
+    Single pass over jobs producing (work_events, hold_events).
+    WORK jobs use their own hours when set, else work_hours; HOLD jobs use hold_hours.
+    """
+    work_events: List[str] = []
+    hold_events: List[str] = []
+    hold_st = time(hold_hours[0], 0)
+    hold_et = time(hold_hours[1], 0)
 
-def build_hold_events(jobs: List[Job], hold_start: int, hold_end: int, run_id: str) -> List[str]:
-    events: List[str] = []
     for j in jobs:
-        if j.kind != "HOLD":
+        if j.kind == "WORK":
+            start_h = j.work_start_hour if j.work_start_hour is not None else work_hours[0]
+            end_h = j.work_end_hour if j.work_end_hour is not None else work_hours[1]
+            if end_h <= start_h:
+                end_h = min(23, start_h + 8)
+            st_t = time(start_h, 0)
+            et_t = time(end_h, 0)
+            events = work_events
+        elif j.kind == "HOLD":
+            st_t = hold_st
+            et_t = hold_et
+            events = hold_events
+        else:
             continue
 
         desc = add_runid(j.notes or f"Status: {j.status}", run_id)
+        summary = f"{j.kind}: {j.title}"
+        uid_base = uid_hasher(f"{j.kind}|{run_id}|{j.title}|")
 
-        d = j.start_date
-        while d <= j.end_date:
-            start_dt = datetime.combine(d, time(hold_start, 0))
-            end_dt = datetime.combine(d, time(hold_end, 0))
-            uid = make_uid(f"HOLD|{run_id}|{j.title}|{start_dt.isoformat()}|{end_dt.isoformat()}")
-            events.append(vevent_timed(f"HOLD: {j.title}", start_dt, end_dt, j.location, desc, uid))
-            d += timedelta(days=1)
+        for d in iter_days(j.start_date, j.end_date):
+            start_dt = datetime.combine(d, st_t)
+            end_dt = datetime.combine(d, et_t)
+            uid = make_uid(f"{start_dt.isoformat()}|{end_dt.isoformat()}", uid_base)
+            events.append(vevent_timed(summary, start_dt, end_dt, j.location, desc, uid, dtstamp))
 
-    return events
+    return work_events, hold_events
 
 
 # -----------------------------
 # UI
 # -----------------------------
+@st.cache_data(show_spinner=False, ttl="1h", max_entries=64)
+def _parse_jobs_cached(text: str) -> List[Dict]:
+    """
+    Parsed jobs keyed on the pasted text, as plain dicts (rebuild with Job(**d)),
+    so clicking Parse jobs again on the same text skips parsing.
+    Short-lived because dateutil fills missing date parts (year, day) from today.
+    """
+    return [{f.name: getattr(j, f.name) for f in fields(Job) if f.init} for j in parse_jobs(text)]
+
 st.set_page_config(page_title="Itinerary Calendar Builder (V4)", page_icon="🗓️", layout="wide")
 st.title("🗓️ Itinerary Calendar Builder (V4)")
 st.caption(
@@ -455,7 +516,7 @@ st.session_state.raw_input = raw
 
 parse_btn = st.button("Parse jobs", type="primary")
 if parse_btn:
-    st.session_state.jobs = parse_jobs(raw)
+    st.session_state.jobs = [Job(**d) for d in _parse_jobs_cached(raw)]
 
 jobs: List[Job] = st.session_state.jobs
 if not jobs:
@@ -463,18 +524,13 @@ if not jobs:
     st.stop()
 
 st.subheader("Review / edit jobs")
-df = pd.DataFrame([{
-    "title": j.title,
-    "location": j.location,
-    "start_date": j.start_date,
-    "end_date": j.end_date,
-    "status": j.status,
-    "kind": j.kind,
-    "include_travel": j.include_travel,
-    "work_start_hour": j.work_start_hour,
-    "work_end_hour": j.work_end_hour,
-    "notes": j.notes,
-} for j in jobs])
+df = pd.DataFrame({
+    col: [getattr(j, col) for j in jobs]
+    for col in (
+        "title", "location", "start_date", "end_date", "status", "kind",
+        "include_travel", "work_start_hour", "work_end_hour", "notes",
+    )
+})
 
 edited = st.data_editor(
     df,
@@ -490,28 +546,34 @@ edited = st.data_editor(
     }
 )
 
-# Apply edits back into Job objects
-new_jobs: List[Job] = []
-for _, r in edited.iterrows():
-    new_jobs.append(Job(
-        title=str(r["title"]),
-        location=str(r["location"]),
-        start_date=pd.to_datetime(r["start_date"]).date(),
-        end_date=pd.to_datetime(r["end_date"]).date(),
-        status=str(r["status"]),
-        kind=str(r["kind"]),
-        include_travel=bool(r["include_travel"]),
-        work_start_hour=None if pd.isna(r["work_start_hour"]) else int(r["work_start_hour"]),
-        work_end_hour=None if pd.isna(r["work_end_hour"]) else int(r["work_end_hour"]),
-        notes=str(r["notes"]) if pd.notna(r["notes"]) else "",
-    ))
+# Apply edits back into Job objects (whole-column conversions, then plain dicts)
+for col in ("title", "location", "status", "kind"):
+    edited[col] = edited[col].fillna("").astype(str)
+for col in ("start_date", "end_date"):
+    edited[col] = pd.to_datetime(edited[col]).dt.date
+for col in ("work_start_hour", "work_end_hour"):
+    # Truncate like int() did: the editor accepts fractional hours (e.g. 9.5)
+    hours = np.trunc(pd.to_numeric(edited[col])).astype("Int64")
+    # Job expects Optional[int]: NA becomes None
+    edited[col] = hours.astype(object).where(hours.notna(), None)
+edited["include_travel"] = edited["include_travel"].astype(bool)
+edited["notes"] = edited["notes"].fillna("").astype(str)
+
+new_jobs: List[Job] = [Job(**r) for r in edited.to_dict("records")]
 
 st.session_state.jobs = new_jobs
 jobs = new_jobs
 
-# Build events
-work_events = build_work_events(jobs, int(default_work_start), int(default_work_end), run_id)
-hold_events = build_hold_events(jobs, int(hold_start), int(hold_end), run_id)
+# Build events (one DTSTAMP shared by the whole export)
+dtstamp = dt_to_ics(datetime.utcnow())
+work_events, hold_events = build_events(
+    jobs,
+    work_hours=(int(default_work_start), int(default_work_end)),
+    hold_hours=(int(hold_start), int(hold_end)),
+    run_id=run_id,
+    dtstamp=dtstamp,
+)
+runs = merge_city_runs(jobs)
 travel_events, _warnings = compute_trip_boundary_travel(
     jobs=jobs,
     home_base=home_base,
@@ -519,14 +581,15 @@ travel_events, _warnings = compute_trip_boundary_travel(
     travel_start_hour=int(travel_start_hour),
     travel_end_hour=int(travel_end_hour),
     run_id=run_id,
+    dtstamp=dtstamp,
+    runs=runs,
 )
 
 st.subheader("Travel summary")
-runs = merge_city_runs(jobs)
+home_norm = normalize_location(home_base)
 trip_runs = [
     r for r in runs
-    if normalize_location(r["city_label"]) != normalize_location(home_base)
-    and not is_unknown_location(r["city_label"])
+    if r["city_norm"] != home_norm and r["city_norm"] not in UNKNOWN_LOCATIONS
 ]
 st.write(f"Detected city runs: {len(runs)}  •  Non-home runs (eligible for travel): {len(trip_runs)}")
 